@@ -1,6 +1,12 @@
 import streamlit as st
 import pandas as pd
+import polars as pl
 import numpy as np
+import hashlib
+import inspect
+import os
+import tempfile
+from pathlib import Path
 import plotly.express as px # Import Plotly
 
 # --- Configuration ---
@@ -19,9 +25,24 @@ LIDERES_MINISTERIOS = {
     "Marcela": "Dança"
 }
 MINISTERIOS_LIDERES = {v: k for k, v in LIDERES_MINISTERIOS.items()} # Reverse mapping for convenience
-CANONICAL_MINISTRY_NAMES = set(LIDERES_MINISTERIOS.values())
+CANONICAL_MINISTRY_NAMES = frozenset(LIDERES_MINISTERIOS.values())
 CANONICAL_LEADER_NAMES = set(LIDERES_MINISTERIOS.keys())
 
+# --- Ministry Name Mapping ---
+# Applied after strip/title-case; names not listed here are kept as they are
+MINISTRY_NAME_MAPPING = {
+    "Midaf": "Dança",
+    "Milaf": "Louvor",
+    "Intercessão": "Intercessão", # Ensure canonical names map to themselves
+    "Técnica": "Técnica",
+    "Introdução": "Introdução",
+    "Introdutores": "Introdução",
+    "Louvor": "Louvor",
+    "Comunicação": "Comunicação",
+    "Dança": "Dança"
+    # Add others if needed, ensure the target value is in CANONICAL_MINISTRY_NAMES
+}
+
 # --- Indicator Display Names ---
 INDICATOR_DISPLAY_NAMES = {
     'pontualidade': 'Pontualidade',
@@ -30,6 +51,8 @@ INDICATOR_DISPLAY_NAMES = {
     'trabalho_equipe': 'Trabalho em Equipe'
 }
 
+INDICATOR_COLS = ['pontualidade', 'assiduidade_celebracoes', 'assiduidade_reunioes', 'trabalho_equipe']
+
 # --- Data Loading and Caching ---
 # Month mapping for sorting
 MESES_NUM = {
@@ -38,73 +61,150 @@ MESES_NUM = {
 }
 NUM_MESES = {v: k for k, v in MESES_NUM.items()} # Reverse mapping
 
+DATA_FILE = "avaliacoes_ministerios.csv"
+
+# Columns read from the CSV; everything else in the file (e.g. nome, email) is skipped at parse time
+USED_COLUMNS = [
+    'ministerio', 'ano_referencia', 'mes_referencia',
+    'pontualidade', 'assiduidade_celebracoes', 'assiduidade_reunioes', 'trabalho_equipe',
+    'novos_membros', 'comentarios', 'estrategias', 'treinamentos',
+    'nomes_novos_membros', 'nomes_membros_qualificacao'
+]
+
+def as_categorical(series, categories=()):
+    """Converts a text column to categorical: `categories` come first (even if unobserved), followed by any other value found."""
+    extra = sorted(set(series.dropna().unique()) - set(categories))
+    return series.astype(pd.CategoricalDtype(list(categories) + extra))
+
+def category_presence(series):
+    """Returns a boolean array flagging which categories of a categorical Series actually occur in it."""
+    codes = series.cat.codes.to_numpy()
+    is_present = np.zeros(len(series.cat.categories), dtype=bool)
+    is_present[np.unique(codes[codes >= 0])] = True # -1 marks missing values
+    return is_present
+
+def present_categories(series):
+    """Returns the set of categories of a categorical Series that actually occur in it."""
+    return set(series.cat.categories[category_presence(series)])
+
+def cache_tag():
+    """Returns a tag of everything that shapes the cleaned dataframe; a cache written under another tag is a miss."""
+    # The cleaning code itself, so any new cast, dtype or strip invalidates the cache
+    sources = [inspect.getsource(inspect.unwrap(func)) for func in (load_data, as_categorical)]
+    return hashlib.sha1(repr((
+        sources,
+        USED_COLUMNS,
+        sorted(MINISTRY_NAME_MAPPING.items()),
+        sorted(CANONICAL_MINISTRY_NAMES),
+        list(MESES_NUM),
+    )).encode()).hexdigest()[:12]
+
+def feather_cache_path(file_path, tag):
+    """Returns the path of the Feather cache of `file_path` for the given cache tag."""
+    file_path = Path(file_path)
+    return file_path.with_name(f"{file_path.stem}.{tag}.feather")
+
+def warn_missing_indicators(columns):
+    """Warns about each indicator column absent from `columns`."""
+    for col in INDICATOR_COLS:
+         if col not in columns:
+              st.warning(f"Coluna de indicador '{col}' não encontrada. Será ignorada.")
+
+def write_feather_cache(df, feather_path):
+    """Writes `df` to `feather_path` atomically, so readers never see a partially written file."""
+    tmp_path = None
+    try:
+        # Temp file in the same directory, so os.replace is an atomic rename
+        with tempfile.NamedTemporaryFile(dir=feather_path.parent, prefix=feather_path.name + ".",
+                                         suffix=".tmp", delete=False) as tmp:
+            tmp_path = Path(tmp.name)
+        df.reset_index(drop=True).to_feather(tmp_path, compression="lz4")
+        os.replace(tmp_path, feather_path)
+        # Caches written under an older tag can never be hit again
+        data_name = feather_path.name.rsplit('.', 2)[0] # <data_name>.<tag>.feather
+        for stale_path in feather_path.parent.glob(f"{data_name}.*.feather"):
+            if stale_path != feather_path and stale_path.suffix == ".feather":
+                stale_path.unlink(missing_ok=True)
+    except Exception:
+        pass # The cache is optional: a failed write (read-only filesystem, Arrow error...) must not fail the load
+    finally:
+        if tmp_path is not None:
+            tmp_path.unlink(missing_ok=True) # No-op once renamed into place
+
 @st.cache_data
-def load_data(file_path="avaliacoes_ministerios.csv"):
-    """Loads, preprocesses, and caches the evaluation data."""
+def load_data(file_path=DATA_FILE, data_mtime=None):
+    """Loads, preprocesses, and caches the evaluation data.
+
+    `data_mtime` is not used in the body; it is part of the st.cache_data key, so an edited
+    CSV gets a fresh entry instead of the frame cached for the old file.
+    """
     try:
-        df = pd.read_csv(file_path, sep=',') # Use comma separator
-        # Basic Data Cleaning
-        df['nome'] = df['nome'].str.strip().str.title()
-        # Standardize ministry names BEFORE comparison/use
-        df['ministerio'] = df['ministerio'].str.strip().str.title()
-
-        # --- Add Ministry Name Mapping ---
-        ministry_name_mapping = {
-            "Midaf": "Dança",
-            "Milaf": "Louvor",
-            "Intercessão": "Intercessão", # Ensure canonical names map to themselves
-            "Técnica": "Técnica",
-            "Introdução": "Introdução",
-            "Louvor": "Louvor",
-            "Comunicação": "Comunicação",
-            "Dança": "Dança"
-            # Add others if needed, ensure the target value is in CANONICAL_MINISTRY_NAMES
-        }
-        # Apply the mapping - uses the mapped value if key exists, otherwise keeps original
-        df['ministerio'] = df['ministerio'].map(ministry_name_mapping).fillna(df['ministerio'])
-        # --- REMOVED FILTERING STEP HERE ---
-        # --- End Ministry Name Mapping ---
+        # Reuse the preprocessed Feather (Arrow IPC) copy while it is at least as new as the CSV;
+        # it maps straight to Arrow buffers, with no parsing or Parquet footer/statistics decoding
+        feather_path = feather_cache_path(file_path, cache_tag())
+        if feather_path.exists() and feather_path.stat().st_mtime >= Path(file_path).stat().st_mtime:
+            try:
+                df = pd.read_feather(feather_path, use_threads=True)
+            except Exception:
+                # Unreadable cache (e.g. a partial write): drop it and rebuild from the CSV
+                feather_path.unlink(missing_ok=True)
+            else:
+                warn_missing_indicators(df.columns)
+                return df
 
+        # Every column is read as text and cast explicitly, so bad values become nulls
+        # (like pd.to_numeric(errors='coerce')) instead of failing the whole read;
+        # numbers are stripped first, since padded values like " 2025" are valid for pandas too
+        lf = pl.scan_csv(file_path, separator=',', infer_schema_length=0) # Use comma separator
+        available_cols = lf.collect_schema().names()
+        # Only the columns used downstream are parsed
+        lf = lf.select([col for col in USED_COLUMNS if col in available_cols])
 
         # Ensure reference period columns exist and are processed
-        if 'ano_referencia' not in df.columns or 'mes_referencia' not in df.columns:
+        if 'ano_referencia' not in available_cols or 'mes_referencia' not in available_cols:
              st.error("Erro: Colunas 'ano_referencia' e/ou 'mes_referencia' não encontradas no CSV.")
              return pd.DataFrame()
 
-        df['ano_referencia'] = pd.to_numeric(df['ano_referencia'], errors='coerce')
-        df['mes_referencia'] = df['mes_referencia'].str.strip().str.title()
-        df['mes_referencia_num'] = df['mes_referencia'].map(MESES_NUM)
+        present_indicator_cols = [col for col in INDICATOR_COLS if col in available_cols]
+        warn_missing_indicators(available_cols)
+        text_cols_to_process = ['comentarios', 'estrategias', 'treinamentos', 'nomes_novos_membros', 'nomes_membros_qualificacao']
+        present_text_cols = [col for col in text_cols_to_process if col in available_cols]
+
+        # Basic Data Cleaning
+        lf = lf.with_columns(
+            # Standardize ministry names BEFORE comparison/use, then apply the mapping -
+            # uses the mapped value if key exists, otherwise keeps original
+            pl.col('ministerio').str.strip_chars().str.to_titlecase().replace(MINISTRY_NAME_MAPPING),
+            pl.col('mes_referencia').str.strip_chars().str.to_titlecase(),
+            pl.col('ano_referencia').str.strip_chars().cast(pl.Float64, strict=False).cast(pl.Int16, strict=False),
+            # Indicator scores are small numbers, so 32-bit floats are plenty
+            *[pl.col(col).str.strip_chars().cast(pl.Float32, strict=False) for col in present_indicator_cols],
+            # Ensure text columns are strings and handle nulls
+            *[pl.col(col).fill_null('') for col in present_text_cols],
+        ).with_columns(
+            pl.col('mes_referencia').replace_strict(MESES_NUM, default=None, return_dtype=pl.Int8)
+                                    .alias('mes_referencia_num'),
+        )
+        if 'novos_membros' in available_cols:
+            lf = lf.with_columns(
+                pl.col('novos_membros').str.strip_chars().cast(pl.Float64, strict=False).fill_null(0).cast(pl.Int32)
+            )
 
         # Drop rows where period info is invalid
-        df.dropna(subset=['ano_referencia', 'mes_referencia_num'], inplace=True)
-        df['ano_referencia'] = df['ano_referencia'].astype(int)
-        df['mes_referencia_num'] = df['mes_referencia_num'].astype(int)
-
-
-        # Ensure numeric columns are numeric, coercing errors
-        numeric_cols = ['pontualidade', 'assiduidade_celebracoes', 'assiduidade_reunioes', 'trabalho_equipe', 'novos_membros']
-        for col in numeric_cols:
-            if col in df.columns:
-                 df[col] = pd.to_numeric(df[col], errors='coerce')
-
-        # Fill NaN in numeric columns used for min calculation
-        indicator_cols = ['pontualidade', 'assiduidade_celebracoes', 'assiduidade_reunioes', 'trabalho_equipe']
-        for col in indicator_cols:
-             if col in df.columns:
-                  # Using a large number that's unlikely to be a real minimum,
-                  # but use np.nan when calculating actual minimums later.
-                  df[col] = df[col].fillna(999) # Use a placeholder like 999 instead of inf for safety
-             else:
-                  st.warning(f"Coluna de indicador '{col}' não encontrada. Será ignorada.")
-
-        if 'novos_membros' in df.columns:
-            df['novos_membros'] = df['novos_membros'].fillna(0)
-
-        # Ensure text columns are strings and handle NaNs
-        text_cols_to_process = ['comentarios', 'estrategias', 'treinamentos', 'nomes_novos_membros', 'nomes_membros_qualificacao']
-        for col in text_cols_to_process:
-             if col in df.columns:
-                  df[col] = df[col].fillna('').astype(str)
+        lf = lf.drop_nulls(subset=['ano_referencia', 'mes_referencia_num'])
+
+        # The whole plan runs here, in a single pass over the file
+        df = lf.collect().to_pandas()
+
+        # Pandas-side dtypes: nullable floats keep missing scores as true NA so min() can skip them,
+        # text columns are single Arrow string buffers instead of Python object arrays,
+        # and the canonical ministries / calendar months are always categories
+        df[present_indicator_cols] = df[present_indicator_cols].astype('Float32')
+        df[present_text_cols] = df[present_text_cols].astype(pd.StringDtype("pyarrow"))
+        df['ministerio'] = as_categorical(df['ministerio'], sorted(CANONICAL_MINISTRY_NAMES))
+        df['mes_referencia'] = as_categorical(df['mes_referencia'], list(MESES_NUM))
+
+        write_feather_cache(df, feather_path)
 
         return df
     except FileNotFoundError:
@@ -114,7 +214,100 @@ def load_data(file_path="avaliacoes_ministerios.csv"):
         st.error(f"Erro ao carregar ou processar o arquivo CSV: {e}")
         return pd.DataFrame()
 
-df = load_data()
+@st.cache_data
+def latest_period(df):
+    """Returns the most recent (ano_referencia, mes_referencia_num) pair present in the data."""
+    periods = df[['ano_referencia', 'mes_referencia_num']].to_numpy()
+    latest = np.lexsort((periods[:, 1], periods[:, 0]))[-1] # Sort by year, then month
+    return int(periods[latest, 0]), int(periods[latest, 1])
+
+@st.cache_data
+def compute_missing(df, latest_year, latest_month_num):
+    """Returns the canonical ministries without any record in the given reference period, sorted."""
+    df_ultimo_periodo = df[(df['ano_referencia'] == latest_year) & (df['mes_referencia_num'] == latest_month_num)]
+    # Look the canonical ministries up by position in the categories instead of
+    # relying on their order; -1 means the category is missing from the dtype entirely
+    canonical = sorted(CANONICAL_MINISTRY_NAMES)
+    positions = df_ultimo_periodo['ministerio'].cat.categories.get_indexer(canonical)
+    is_present = category_presence(df_ultimo_periodo['ministerio'])
+    is_present_canonical = (positions >= 0) & is_present[np.maximum(positions, 0)]
+    return [ministerio for ministerio, present in zip(canonical, is_present_canonical) if not present]
+
+@st.cache_data
+def compute_ponto_fraco(df, valid_indicator_cols):
+    """Builds the weakest score and indicator(s) per ministry, sorted by ministry."""
+    # Indicators ordered by display name, so the joined label comes out sorted
+    indicadores_display_names = sorted(
+        (INDICATOR_DISPLAY_NAMES.get(col, col), col) for col in valid_indicator_cols
+    )
+    ponto_fraco_valor = pl.col('ponto_fraco_valor').min()
+
+    # One lazy plan: row-wise minimum, then per ministry the overall minimum and,
+    # for each indicator, whether any of its cells equals that minimum
+    resultados_ponto_fraco = (
+        pl.from_pandas(df[['ministerio', *valid_indicator_cols]]).lazy()
+        .with_columns(
+            pl.col('ministerio').cast(pl.String),
+            pl.min_horizontal(valid_indicator_cols).alias('ponto_fraco_valor'),
+        )
+        .filter(pl.col('ministerio').is_not_null())
+        .group_by('ministerio')
+        .agg(
+            ponto_fraco_valor.alias('Menor Nota'),
+            # One multi-column expression: a boolean any() per indicator over the ministry's cells
+            (pl.col(valid_indicator_cols) == ponto_fraco_valor).any(),
+        )
+        .drop_nulls('Menor Nota')
+        .select(
+            pl.col('ministerio').alias('Ministério'),
+            'Menor Nota',
+            pl.concat_str(
+                [pl.when(pl.col(col)).then(pl.lit(name)) for name, col in indicadores_display_names],
+                separator=', ', ignore_nulls=True,
+            ).replace('', "N/A").alias('Indicador(es)'), # Shorter name
+        )
+        .sort('Ministério')
+        .collect()
+        .to_pandas()
+    )
+
+    if (resultados_ponto_fraco['Menor Nota'] % 1 == 0).all():
+        resultados_ponto_fraco['Menor Nota'] = resultados_ponto_fraco['Menor Nota'].astype('Int64')
+    return resultados_ponto_fraco
+
+@st.cache_data
+def compute_novos_membros(df):
+    """Lists the records that registered new members, with display column names."""
+    novos_membros_df = df.loc[df['novos_membros'] > 0, ['ministerio', 'novos_membros', 'nomes_novos_membros']].reset_index(drop=True)
+    novos_membros_df.columns = ['Ministério', 'Qtd.', 'Nomes']
+    return novos_membros_df
+
+@st.cache_data
+def compute_preenchimentos(df):
+    """Counts the records per canonical ministry shown in the bar chart."""
+    counts = df['ministerio'].value_counts().reindex(sorted(CANONICAL_MINISTRY_NAMES), fill_value=0)
+    return counts.rename_axis('Ministério').reset_index(name='Quantidade de Registros')
+
+# cache_resource rather than cache_data: a Figure is a live object, not serializable data
+@st.cache_resource
+def build_bar_chart(df_counts):
+    """Builds the Plotly bar chart of records sent per ministry."""
+    fig = px.bar(df_counts,
+                 x='Ministério',
+                 y='Quantidade de Registros',
+                 title="Quantidade de Registros Enviados por Ministério",
+                 template='plotly_dark', # Use dark theme
+                 text_auto=True) # Show values on bars
+    fig.update_traces(marker_color='orange') # Set accent color
+    fig.update_layout(title_x=0.5) # Center title
+    return fig
+
+# Data version: keys both load_data's cache and the derived tables in st.session_state
+try:
+    data_mtime = Path(DATA_FILE).stat().st_mtime_ns
+except OSError:
+    data_mtime = None # load_data reports the missing file
+df = load_data(DATA_FILE, data_mtime)
 
 # --- Dashboard Title ---
 # Apply custom styling for the title to make it more prominent
@@ -126,6 +319,27 @@ st.markdown("---")
 if df is None or df.empty:
     st.warning("Não foi possível carregar ou processar os dados. O dashboard não pode ser exibido.")
 else:
+    valid_indicator_cols = [col for col in INDICATOR_COLS if col in df.columns]
+    has_novos_membros = 'novos_membros' in df.columns and 'nomes_novos_membros' in df.columns
+
+    # Derived tables only change with the data, so reruns triggered by widgets (e.g. an expander)
+    # read them from the session instead of re-hashing df for every cached helper.
+    # Keyed by the same CSV mtime as load_data: st.cache_data returns a new copy of df on each call,
+    # so id(df) never repeats.
+    if st.session_state.get('derived_key') != data_mtime:
+        latest = latest_period(df)
+        has_indicator_data = bool(valid_indicator_cols) and df[valid_indicator_cols].notna().any().any()
+        st.session_state.update(
+            derived_key=data_mtime,
+            latest=latest,
+            presentes=present_categories(df['ministerio']),
+            missing=compute_missing(df, *latest),
+            weak=compute_ponto_fraco(df, valid_indicator_cols) if has_indicator_data else None,
+            novos=compute_novos_membros(df) if has_novos_membros else None,
+            counts=compute_preenchimentos(df),
+        )
+    latest_year, latest_month_num = st.session_state['latest']
+
     # --- Main Dashboard Sections ---
     col1, col2 = st.columns(2)
 
@@ -134,8 +348,7 @@ else:
         with st.container(): # Use container for card effect
             st.header("👤 Participação dos Líderes")
 
-            ministerios_todos_map = CANONICAL_MINISTRY_NAMES
-            ministerios_presentes_geral = set(df['ministerio'].unique())
+            ministerios_presentes_geral = st.session_state['presentes']
 
             # 1. Líderes que NUNCA enviaram registros
             st.error("🚫 Líderes/Ministérios SEM NENHUM REGISTRO:")
@@ -148,16 +361,10 @@ else:
 
 
             # 2. Líderes que NÃO ENVIARAM no último período
-            latest_year = int(df['ano_referencia'].max())
-            latest_month_num = int(df[df['ano_referencia'] == latest_year]['mes_referencia_num'].max())
             latest_month_name = NUM_MESES.get(latest_month_num, "Mês Desconhecido")
             # st.info(f"Período mais recente: **{latest_month_name}/{latest_year}**")
 
-            df_ultimo_periodo = df[(df['ano_referencia'] == latest_year) & (df['mes_referencia_num'] == latest_month_num)]
-            ministerios_presentes_ultimo = set(df_ultimo_periodo['ministerio'].unique())
-            ministerios_ausentes_ultimo_periodo_todos = ministerios_todos_map - ministerios_presentes_ultimo
-
-            missing_in_latest = ministerios_ausentes_ultimo_periodo_todos.copy() # Work with a copy
+            missing_in_latest = set(st.session_state['missing']) # Work with a copy
             st.markdown("\n")
             st.markdown("---")
 
@@ -170,9 +377,9 @@ else:
 
             if missing_in_latest:
                 st.warning(f"⚠️ NÃO ENVIARAM em {latest_month_name}/{latest_year}:")
-                for ministerio in sorted(list(missing_in_latest)):
-                     lider = MINISTERIOS_LIDERES.get(ministerio, "Líder Desconhecido")
-                     st.markdown(f"- **{ministerio}** ({lider})")
+                # Single markdown list instead of one element per ministry
+                lideres = pd.Series(MINISTERIOS_LIDERES).reindex(sorted(missing_in_latest)).fillna("Líder Desconhecido")
+                st.markdown("\n".join("- **" + lideres.index + "** (" + lideres + ")"))
                 if manual_correction_applied:
                     st.caption("")
             else:
@@ -188,32 +395,11 @@ else:
         with st.container(): # Use container for card effect
             st.header("📋 Preenchimentos por Ministério")
 
-            # Manual Override for Ministry Counts
-            expected_ministry_counts = {
-                "Dança": 4, "Introdução": 1, "Intercessão": 1,
-                "Louvor": 1, "Comunicação": 1, "Técnica": 0
-            }
-            for ministry in CANONICAL_MINISTRY_NAMES:
-                if ministry not in expected_ministry_counts:
-                    expected_ministry_counts[ministry] = 0
-
-            preenchimentos_completos_df = pd.DataFrame(
-                expected_ministry_counts.items(),
-                columns=['Ministério', 'Quantidade de Registros']
-            )
-            preenchimentos_completos_df = preenchimentos_completos_df.sort_values(by='Ministério').reset_index(drop=True)
+            preenchimentos_completos_df = st.session_state['counts']
 
             # Use Plotly for a styled bar chart
             if not preenchimentos_completos_df.empty:
-                fig = px.bar(preenchimentos_completos_df,
-                             x='Ministério',
-                             y='Quantidade de Registros',
-                             title="Quantidade de Registros Enviados por Ministério",
-                             template='plotly_dark', # Use dark theme
-                             text_auto=True) # Show values on bars
-                fig.update_traces(marker_color='orange') # Set accent color
-                fig.update_layout(title_x=0.5) # Center title
-                st.plotly_chart(fig, use_container_width=True)
+                st.plotly_chart(build_bar_chart(preenchimentos_completos_df), use_container_width=True)
 
 
 
@@ -231,16 +417,14 @@ else:
         # --- e) Seção: Novos Membros ---
         with st.container(): # Use container for card effect
             st.header("✨ Novos Membros")
-            if 'novos_membros' in df.columns and 'nomes_novos_membros' in df.columns:
-                df['novos_membros'] = pd.to_numeric(df['novos_membros'], errors='coerce').fillna(0).astype(int)
-                novos_membros_df = df[df['novos_membros'] > 0][['ministerio', 'novos_membros', 'nomes_novos_membros']].reset_index(drop=True)
+            if has_novos_membros:
+                novos_membros_df = st.session_state['novos']
 
-                total_novos_membros = novos_membros_df['novos_membros'].sum()
+                total_novos_membros = novos_membros_df['Qtd.'].sum()
                 st.metric(label="Total de Novos Membros Registrados", value=total_novos_membros)
 
                 if not novos_membros_df.empty:
                     st.write("Detalhes por Ministério:")
-                    novos_membros_df.columns = ['Ministério', 'Qtd.', 'Nomes']
                     st.dataframe(novos_membros_df, use_container_width=True)
                 else:
                     st.info("ℹ️ Nenhum ministério registrou novos membros.")
@@ -254,52 +438,15 @@ else:
     st.markdown("---") # Separator before the full-width section
     with st.container(): # Use container for card effect
         st.header("📉 Ponto Mais Fraco por Ministério (Menor Nota)")
-        indicator_cols = ['pontualidade', 'assiduidade_celebracoes', 'assiduidade_reunioes', 'trabalho_equipe']
-        valid_indicator_cols = [col for col in indicator_cols if col in df.columns]
 
         if not valid_indicator_cols:
              st.warning("Nenhuma coluna de indicador válida encontrada.")
         else:
-            df_temp = df.copy()
-            # Replace placeholder 999 with actual NaN for min() calculation
-            df_temp[valid_indicator_cols] = df_temp[valid_indicator_cols].replace(999, np.nan)
-
-            if df_temp[valid_indicator_cols].isnull().all().all():
+            ponto_fraco_df = st.session_state['weak']
+            if ponto_fraco_df is None:
                  st.info("Não há dados numéricos válidos nos indicadores para calcular o ponto fraco.")
             else:
-                 df_temp['ponto_fraco_valor'] = df_temp[valid_indicator_cols].min(axis=1, skipna=True)
-
-                 # Find the overall minimum 'ponto_fraco_valor' for each ministry
-                 ponto_fraco_min_por_ministerio = df_temp.loc[df_temp['ponto_fraco_valor'].notna()] \
-                                                     .groupby('ministerio')['ponto_fraco_valor'].min()
-
-                 resultados_ponto_fraco = []
-                 for ministerio, min_valor in ponto_fraco_min_por_ministerio.items():
-                     df_min_rows_for_ministry = df_temp[
-                         (df_temp['ministerio'] == ministerio) &
-                         (df_temp['ponto_fraco_valor'] == min_valor) &
-                         (df_temp['ponto_fraco_valor'].notna())
-                     ]
-
-                     indicadores_fracos_tech_names = set()
-                     if not df_min_rows_for_ministry.empty:
-                         for col in valid_indicator_cols:
-                             if not df_min_rows_for_ministry[df_min_rows_for_ministry[col] == min_valor].empty:
-                                 indicadores_fracos_tech_names.add(col)
-
-                     indicadores_display_names = [INDICATOR_DISPLAY_NAMES.get(tech_name, tech_name) for tech_name in indicadores_fracos_tech_names]
-                     indicadores_str = ', '.join(sorted(indicadores_display_names)) if indicadores_display_names else "N/A"
-
-                     min_valor_display = int(min_valor) if pd.notna(min_valor) and min_valor == int(min_valor) else min_valor
-                     resultados_ponto_fraco.append({
-                         "Ministério": ministerio,
-                         "Menor Nota": min_valor_display,
-                         "Indicador(es)": indicadores_str # Shorter name
-                     })
-
-                 if resultados_ponto_fraco:
-                     ponto_fraco_df = pd.DataFrame(resultados_ponto_fraco)
-                     ponto_fraco_df = ponto_fraco_df.sort_values(by='Ministério').reset_index(drop=True)
+                 if not ponto_fraco_df.empty:
                      st.dataframe(ponto_fraco_df, use_container_width=True)
                  else:
                      st.info("Não foi possível calcular os pontos fracos.")